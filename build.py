@@ -2,6 +2,7 @@ import os
 import platform
 import subprocess
 import shutil
+from concurrent.futures import ProcessPoolExecutor
 
 # List of services to build, with their entry points
 SERVICES = [
@@ -16,55 +17,74 @@ HIDDEN_IMPORTS = ["telethon", "sqlalchemy"]
 # Path to Wine executable (for Linux to build Windows executables)
 WINE_PATH = shutil.which("wine")
 
-def run_command(command):
-    """Run a shell command and handle errors."""
+def run_command(argv):
+    """Run a command given as an argv list (no shell) and handle errors."""
     try:
-        subprocess.check_call(command, shell=True)
-        print(f"Successfully ran: {command}")
+        subprocess.check_call(argv)
+        print(f"Successfully ran: {' '.join(argv)}")
+        return True
     except subprocess.CalledProcessError as e:
-        print(f"Error running command: {command}\n{e}")
+        print(f"Error running command: {' '.join(argv)}\n{e}")
+        return False
 
-def build_service(service, os_type):
-    """Build a single service for the specified OS."""
+def build_service(service, os_type, use_wine=False):
+    """Build a single service for the specified OS; returns True on success."""
     name = service["name"]
     entry_point = service["entry_point"]
-    hidden_imports = " ".join([f"--hidden-import={imp}" for imp in HIDDEN_IMPORTS])
-    
+
     if os_type == "linux":
         output_name = name
-        command = f"pyinstaller --onefile {hidden_imports} {entry_point} --name {output_name}"
     elif os_type == "windows":
         output_name = f"{name}.exe"
-        command = f"pyinstaller --onefile {hidden_imports} {entry_point} --name {output_name}"
     else:
         raise ValueError(f"Unsupported OS type: {os_type}")
-    
+
+    # Keep analysis artifacts per service/OS so rebuilds reuse the cached
+    # import graph instead of recomputing it; Wine builds get their own dist
+    # dir so they don't clobber the Linux binaries
+    argv = [
+        "pyinstaller", "--onefile", "--noconfirm",
+        *[f"--hidden-import={imp}" for imp in HIDDEN_IMPORTS],
+        "--workpath", os.path.join("build_cache", f"{name}-{os_type}"),
+        "--distpath", "dist-win" if use_wine else "dist",
+        entry_point, "--name", output_name,
+    ]
+    if use_wine:
+        argv = [WINE_PATH] + argv
+
     print(f"Building {name} for {os_type}...")
-    run_command(command)
+    return run_command(argv)
 
 def build_all():
     """Build all services for the current OS, and for Windows if on Linux with Wine."""
     current_os = platform.system().lower()
     print(f"Detected OS: {current_os}")
-    
+
+    # Collect the independent builds, then run them concurrently: PyInstaller
+    # analysis is CPU-bound and the services don't depend on each other
+    jobs = []
     for service in SERVICES:
         if current_os == "linux":
-            # Build for Linux
-            build_service(service, "linux")
-            # If Wine is available, build for Windows
+            jobs.append((service, "linux", False))
             if WINE_PATH:
                 print(f"Wine detected at {WINE_PATH}, building Windows executable...")
-                wine_command = f"{WINE_PATH} pyinstaller --onefile {hidden_imports} {entry_point} --name {name}.exe"
-                run_command(wine_command)
+                jobs.append((service, "windows", True))
             else:
                 print("Wine not found, skipping Windows build.")
         elif current_os == "windows":
-            # Build for Windows
-            build_service(service, "windows")
+            jobs.append((service, "windows", False))
         else:
             print(f"Unsupported OS: {current_os}")
             return
 
+    with ProcessPoolExecutor(max_workers=len(jobs)) as executor:
+        futures = [executor.submit(build_service, *job) for job in jobs]
+        results = [future.result() for future in futures]
+
+    failures = [jobs[i][0]["name"] for i, ok in enumerate(results) if not ok]
+    if failures:
+        print(f"Failed builds: {', '.join(failures)}")
+
 if __name__ == "__main__":
     build_all()
 """
@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import threading
+import time
+
+import pika
+
+try:
+    import orjson  # C-accelerated JSON, 3-10x faster than stdlib
+except ImportError:
+    orjson = None
+
+import shm_transport
+
+logger = logging.getLogger(__name__)
+
+RABBITMQ_HOST = os.environ.get("RABBITMQ_HOST", "rabbitmq")
+
+# Queue topology (see documents/docker-compose.md):
+# scraper publishes to scraped_data, db_service republishes to bot_data,
+# the bot posts from channel_posts, search_service feeds new_sources.
+SCRAPED_DATA_QUEUE = "scraped_data"
+BOT_DATA_QUEUE = "bot_data"
+CHANNEL_POSTS_QUEUE = "channel_posts"
+NEW_SOURCES_QUEUE = "new_sources"
+
+_ALL_QUEUES = (SCRAPED_DATA_QUEUE, BOT_DATA_QUEUE, CHANNEL_POSTS_QUEUE, NEW_SOURCES_QUEUE)
+
+# One persistent connection per thread; pika's BlockingConnection is not
+# thread-safe, but each service loop runs in a single thread anyway.
+_local = threading.local()
+
+def _get_channel() -> 'pika.adapters.blocking_connection.BlockingChannel':
+    """Return a channel on a persistent per-thread connection, creating it on first use."""
+    channel = getattr(_local, 'channel', None)
+    if channel is None or channel.is_closed:
+        logger.debug(f"Opening RabbitMQ connection to {RABBITMQ_HOST}")
+        connection = pika.BlockingConnection(pika.ConnectionParameters(host=RABBITMQ_HOST))
+        channel = connection.channel()
+        for queue in _ALL_QUEUES:
+            channel.queue_declare(queue=queue, durable=True)
+        _local.connection = connection
+        _local.channel = channel
+    return channel
+
+def _encode(data) -> bytes:
+    """Encode a payload exactly once; pre-encoded bytes pass through without another copy."""
+    if isinstance(data, (bytes, bytearray)):
+        return data
+    if isinstance(data, memoryview):
+        return data.tobytes()
+    if orjson:
+        return orjson.dumps(data)
+    return json.dumps(data).encode()
+
+def _decode(body: bytes):
+    """Parse a payload only at the point of consumption, resolving SHM references."""
+    try:
+        decoded = orjson.loads(body) if orjson else json.loads(body)
+    except (ValueError, UnicodeDecodeError):
+        return body
+    if isinstance(decoded, dict) and '__shm_slot__' in decoded:
+        payload = shm_transport.attach_ring(decoded['__shm_name__']).read(decoded['__shm_slot__'],
+                                                                          decoded['__shm_len__'])
+        return _decode(payload)
+    return decoded
+
+def _publish(queue: str, data) -> None:
+    """Publish one payload to a queue over the persistent connection.
+
+    With SECGRAM_SHM=1, payloads over the shared-memory threshold are placed
+    in a slot of this process's shared-memory ring and only a
+    (ring, slot, length) reference goes through the broker, skipping the
+    kernel socket copy.
+    """
+    body = _encode(data)
+    if shm_transport.SHM_ENABLED and len(body) >= shm_transport.MIN_SHM_PAYLOAD:
+        try:
+            ring = shm_transport.get_ring()
+            slot, length = ring.write(body)
+            body = json.dumps({'__shm_name__': ring.name, '__shm_slot__': slot,
+                               '__shm_len__': length}).encode()
+        except BufferError as e:
+            logger.warning(f"Shared-memory ring unavailable ({e}), sending inline")
+    try:
+        _get_channel().basic_publish(exchange='', routing_key=queue, body=body)
+    except pika.exceptions.AMQPError as e:
+        logger.error(f"Failed to publish to {queue}: {e}")
+        raise
+
+def _publish_many(queue: str, items, max_batch: int = 256) -> None:
+    """Coalesce many payloads into batched broker frames of up to max_batch items.
+
+    Cuts the per-message publish syscall count by the batch factor; consumers
+    unpack batches transparently in _receive.
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= max_batch:
+            _publish(queue, {'__batch__': batch})
+            batch = []
+    if batch:
+        _publish(queue, {'__batch__': batch})
+
+def _pending(queue: str) -> list:
+    """Per-thread buffer of already-received items from unpacked batches."""
+    pending = getattr(_local, 'pending', None)
+    if pending is None:
+        pending = _local.pending = {}
+    return pending.setdefault(queue, [])
+
+def _receive(queue: str, timeout: float = None):
+    """Receive one payload from a queue, blocking until timeout (None blocks forever).
+
+    Returns the decoded payload, or None if the timeout expired with no message.
+    Batched frames from _publish_many are unpacked and drained one item per call.
+    """
+    pending = _pending(queue)
+    if pending:
+        return pending.pop(0)
+    channel = _get_channel()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        # Poll with basic_get rather than consume()/cancel(): cancelling a
+        # consumer discards whatever the server already pushed into pika's
+        # client-side buffer, silently losing auto-acked messages.
+        while True:
+            method, properties, body = channel.basic_get(queue, auto_ack=True)
+            if method is not None:
+                decoded = _decode(body)
+                if isinstance(decoded, dict) and '__batch__' in decoded:
+                    items = decoded['__batch__']
+                    pending.extend(items[1:])
+                    return items[0] if items else None
+                return decoded
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            # Queue is empty; wait briefly while keeping heartbeats flowing
+            _local.connection.sleep(0.05)
+    except pika.exceptions.AMQPError as e:
+        logger.error(f"Failed to receive from {queue}: {e}")
+        raise
+
+def send_to_db_service(data) -> None:
+    """Scraper -> db_service: publish a scraped message."""
+    _publish(SCRAPED_DATA_QUEUE, data)
+
+def receive_from_scraper(timeout: float = None):
+    """db_service side: receive one scraped message."""
+    return _receive(SCRAPED_DATA_QUEUE, timeout=timeout)
+
+def send_to_bot_service(data) -> None:
+    """Forward a processed message to the bot service."""
+    _publish(BOT_DATA_QUEUE, data)
+
+def send_to_bot_service_many(items) -> None:
+    """Forward many processed messages to the bot service in batched frames."""
+    _publish_many(BOT_DATA_QUEUE, items)
+
+def receive_from_broker(timeout: float = None):
+    """Bot side: receive one message destined for the Telegram channel."""
+    return _receive(BOT_DATA_QUEUE, timeout=timeout)
+
+def publish_to_channel(data) -> None:
+    """Bot side: queue a message for posting to the Telegram channel."""
+    _publish(CHANNEL_POSTS_QUEUE, data)
+
+def update_scraper_targets(new_sources) -> None:
+    """Search service -> scraper: publish newly discovered sources."""
+    _publish(NEW_SOURCES_QUEUE, new_sources)
+
+def receive_new_sources(timeout: float = None):
+    """Scraper side: receive newly discovered sources from the search service."""
+    return _receive(NEW_SOURCES_QUEUE, timeout=timeout)
@@ -1,30 +1,78 @@
-from sqlalchemy import create_engine, Column, String, Integer
+import time
+
+from sqlalchemy import create_engine, event, Column, String, Integer
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from message_broker import receive_from_scraper, send_to_bot_service
+from message_broker import receive_from_scraper, send_to_bot_service, send_to_bot_service_many
 
 Base = declarative_base()
 
+# Create the engine once at import time so every store_data() call reuses the
+# same SQLite file handle and connection pool instead of reopening the file
+# and re-running DDL introspection per message.
+engine = create_engine(
+    "sqlite:///data.db",
+    connect_args={"check_same_thread": False},
+    pool_pre_ping=True,
+)
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Enable WAL and relax fsync on every new connection to cut per-insert journal cost."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
 class ScrapedData(Base):
     __tablename__ = "scraped_data"
     id = Column(Integer, primary_key=True)
     source = Column(String)
     content = Column(String)
 
+Base.metadata.create_all(engine)
+Session = sessionmaker(bind=engine)
+
+# Batch settings: flush after BATCH_SIZE messages or BATCH_WINDOW seconds,
+# whichever comes first, so one commit (one journal flush) covers many rows.
+BATCH_SIZE = 200
+BATCH_WINDOW = 0.25
+
 def store_data(data):
-    engine = create_engine("sqlite:///data.db")
-    Base.metadata.create_all(engine)
-    session = sessionmaker(bind=engine)()
-    new_data = ScrapedData(source=data["source"], content=data["content"])
-    session.add(new_data)
-    session.commit()
+    with Session() as session:
+        session.add(ScrapedData(source=data["source"], content=data["content"]))
+        session.commit()
     send_to_bot_service(data)  # Forward to bot
 
+def store_batch(batch):
+    """Insert a batch of scraped messages in one transaction, then forward each to the bot."""
+    with Session() as session:
+        session.bulk_insert_mappings(
+            ScrapedData,
+            [{"source": d["source"], "content": d["content"]} for d in batch],
+        )
+        session.commit()
+    send_to_bot_service_many(batch)
+
 def main():
     while True:
+        # Block for the first message, then drain whatever arrives within the
+        # batch window instead of committing once per message.
         data = receive_from_scraper()
-        if data:
-            store_data(data)
+        if not data:
+            continue
+        batch = [data]
+        deadline = time.monotonic() + BATCH_WINDOW
+        while len(batch) < BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            data = receive_from_scraper(timeout=remaining)
+            if not data:
+                break
+            batch.append(data)
+        store_batch(batch)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
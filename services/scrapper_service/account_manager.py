@@ -1,26 +1,73 @@
 import asyncio
+import hashlib
+import operator
 import os
 import random
 import json
+import time
+from collections import deque
+from functools import lru_cache
 from typing import List, Dict, Optional
 from telethon import TelegramClient
+from telethon.errors import ChannelPrivateError, FloodWaitError, UserBannedInChannelError
 from telethon.tl.functions.channels import JoinChannelRequest
-from telethon.tl.functions.messages import GetHistoryRequest
 import logging
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
 from pathlib import Path
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+try:
+    import orjson  # C-accelerated JSON, 3-10x faster than stdlib
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+
+    class ScrapedMessage(msgspec.Struct, array_like=True):
+        """Wire format for a scraped message; array_like packs it as [source, content]."""
+        source: str
+        content: str
+
+    _msg_encoder = msgspec.json.Encoder()  # Reusable buffer, no per-call dict
+
+    def encode_message(source: str, content: str) -> bytes:
+        """Encode a scraped message for the broker without building a dict."""
+        return _msg_encoder.encode(ScrapedMessage(source, content))
+except ImportError:
+    msgspec = None
+
+    def encode_message(source: str, content: str) -> bytes:
+        """Encode a scraped message for the broker (stdlib fallback)."""
+        return json.dumps({'source': source, 'content': content}).encode()
+
+# Logging is configured by the entry points (telegram_scraper, test); a
+# library module only takes a named logger so importing it has no side
+# effects on the root logger's level or handlers
 logger = logging.getLogger(__name__)
 
 # Import database utilities
-from utils.db_utils import init_db, get_account_status, update_account_status, add_channel, get_joined_channels
+from utils.db_utils import init_db, get_account_status, get_active_account_names, get_active_accounts_with_channels, update_account_status, add_channel, add_channels, get_joined_channels
+from utils.utils import RateLimiter
+
+# Resolve resource locations once at import; every Account reuses them
+_PROJECT_ROOT = Path(__file__).resolve().parents[2]
+_SESSIONS_DIR = _PROJECT_ROOT / 'resources' / 'sessions'
+
+# Bound once so per-message conversion does one C-level getattr sweep
+# instead of three interpreted attribute lookups per Telethon message
+_MSG_FIELDS = operator.attrgetter('id', 'message', 'date')
+_MSG_KEYS = ('id', 'text', 'date')
+
+@lru_cache(maxsize=8)
+def _load_json_cached(path: str, mtime_ns: int):
+    """Load and parse a JSON file, cached by (path, mtime) so unchanged files are parsed once."""
+    if orjson:
+        return orjson.loads(Path(path).read_bytes())
+    with open(path, 'r') as f:
+        return json.load(f)
 
 class Account:
     """Represents a Telegram account with session management and channel tracking using Telethon."""
-    def __init__(self, session_file: str, name: str, api_id: str, api_hash: str, db_path: str, proxy: Optional[Dict] = None, db_conn=None):
+    def __init__(self, session_file: str, name: str, api_id: str, api_hash: str, db_path: str, proxy: Optional[Dict] = None, db_conn=None, connect_sem: Optional[asyncio.Semaphore] = None, limiter: Optional[RateLimiter] = None, is_banned: Optional[bool] = None):
         """
         Initialize an Account instance.
 
@@ -31,112 +78,162 @@ class Account:
         :param db_path: Path to SQLite database
         :param proxy: Optional proxy settings (e.g., {'type': 'http', 'host': '10.65.47.23', 'port': 8080})
         :param db_conn: Shared SQLite connection for database operations
+        :param connect_sem: Optional per-proxy semaphore bounding concurrent handshakes
+        :param limiter: Optional per-proxy RateLimiter shared by all its accounts
+        :param is_banned: Ban state pre-seeded by the caller; None queries the database
         """
-        # Use absolute path for session file
-        project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-        self.session_file = os.path.join(project_root, 'resources', 'sessions', session_file)
+        # Use absolute path for session file, resolved once at module import
+        self.session_file = str(_SESSIONS_DIR / session_file)
         self.name = name  # This is the phone number, e.g., "84896869942"
         self.api_id = api_id
         self.api_hash = api_hash
         self.db_path = db_path
         self.proxy = proxy  # Store as dict: {'type': 'http', 'host': '10.65.47.23', 'port': 8080}
         self.client = None
-        self.is_banned = get_account_status(db_conn, self.name) == 'banned'
+        # AccountManager seeds ban state from one bulk query; the per-account
+        # SELECT remains only for standalone construction
+        if is_banned is None:
+            is_banned = get_account_status(db_conn, self.name) == 'banned'
+        self.is_banned = is_banned
         self.db_conn = db_conn  # Shared SQLite connection for efficiency
+        self._status_cache = (None, 0.0)  # (status, monotonic timestamp)
+        self._join_queue = None  # Created lazily with its background worker
+        self._join_worker_task = None
+        self._scrape_sem = asyncio.Semaphore(8)  # Bound concurrent history fetches per account
+        self._joined_cache = None  # In-memory joined-channel set, kept in sync on writes
+        self._connect_sem = connect_sem  # Shared by accounts on the same proxy
+        self.limiter = limiter  # Shared token bucket pacing requests per proxy
 
     async def connect(self) -> bool:
         """Connect to Telegram using Telethon with optional proxy, with retry logic for connection issues."""
+        # Reuse the live client: reconnecting reruns MTProto auth-key negotiation,
+        # the most expensive part of a Telethon session
+        if self.client and self.client.is_connected():
+            logger.debug(f"Reusing existing connection for {self.name}")
+            return True
+
         logger.debug(f"Attempting Telethon login for {self.name} with session file {self.session_file}")
-        max_retries = 5
-        retry_count = 0
 
-        while retry_count < max_retries:
+        # Session file checks can't change between retries; do them once, in a
+        # worker thread so a slow disk (network mount) never stalls the loop
+        if not await asyncio.to_thread(os.path.exists, self.session_file):
+            logger.error(f"Session file {self.session_file} does not exist")
+            return False
+        if not await asyncio.to_thread(os.access, self.session_file, os.R_OK | os.W_OK):
+            logger.error(f"No read/write permissions for {self.session_file}")
+            return False
+
+        # Configure proxy if provided
+        proxy_settings = None
+        if self.proxy:
+            proxy_type = self.proxy.get('type', 'http').lower()
+            if proxy_type == 'http':
+                proxy_settings = ('http', self.proxy['host'], self.proxy['port'])
+            elif proxy_type == 'socks5':
+                proxy_settings = ('socks5', self.proxy['host'], self.proxy['port'])
+            logger.debug(f"Using proxy for {self.name}: {proxy_settings}")
+
+        # Initialize Telethon client once; only the start() call is retried
+        self.client = TelegramClient(self.session_file, self.api_id, self.api_hash, proxy=proxy_settings)
+
+        max_retries = 5
+        for retry_count in range(max_retries):
             try:
-                # Verify session file existence and permissions
-                if not os.path.exists(self.session_file):
-                    logger.error(f"Session file {self.session_file} does not exist")
-                    return False
-                if not os.access(self.session_file, os.R_OK | os.W_OK):
-                    logger.error(f"No read/write permissions for {self.session_file}")
-                    return False
-
-                # Configure proxy if provided
-                proxy_settings = None
-                if self.proxy:
-                    proxy_type = self.proxy.get('type', 'http').lower()
-                    if proxy_type == 'http':
-                        proxy_settings = ('http', self.proxy['host'], self.proxy['port'])
-                    elif proxy_type == 'socks5':
-                        proxy_settings = ('socks5', self.proxy['host'], self.proxy['port'])
-                    logger.debug(f"Using proxy for {self.name}: {proxy_settings}")
-
-                # Initialize Telethon client with session file and proxy
-                self.client = TelegramClient(self.session_file, self.api_id, self.api_hash, proxy=proxy_settings)
-                await self.client.start()
+                if self._connect_sem:
+                    # Accounts sharing a proxy take turns handshaking so one
+                    # proxy link never absorbs the whole fleet at once
+                    async with self._connect_sem:
+                        await self.client.start()
+                else:
+                    await self.client.start()
                 logger.info(f"Connected account: {self.name} using Telethon session")
                 return True
+            except FloodWaitError as e:
+                # The server tells us exactly how long to wait; honor it
+                logger.warning(f"FloodWait for {self.name}: sleeping {e.seconds}s before reconnect")
+                await asyncio.sleep(e.seconds + 1)
             except Exception as e:
                 logger.error(f"Failed to connect {self.name} (attempt {retry_count + 1}/{max_retries}): {e}")
-                retry_count += 1
-                if retry_count < max_retries:
-                    logger.info(f"Retrying connection in 5 seconds...")
-                    await asyncio.sleep(5)
-                else:
-                    self.client = None  # Ensure client is None on failure
-                    return False
+                if retry_count + 1 < max_retries:
+                    # Fast first retry for flaky-but-recovers errors, capped
+                    # exponential growth, and jitter so simultaneously failing
+                    # accounts don't retry in lockstep
+                    delay = min(30, 0.5 * 2 ** retry_count) + random.uniform(0, 1)
+                    logger.info(f"Retrying connection in {delay:.1f} seconds...")
+                    await asyncio.sleep(delay)
+
+        self.client = None  # Ensure client is None on failure
+        return False
+
+    async def ensure_connected(self) -> bool:
+        """Connect once and reuse the live client; reconnect only after a genuine drop."""
+        return await self.connect()
 
     async def disconnect(self) -> None:
         """Disconnect from Telegram."""
+        if self._join_worker_task:
+            self._join_worker_task.cancel()
+            self._join_worker_task = None
+            self._join_queue = None
         if self.client:
             await self.client.disconnect()
-            logger.debug(f"Disconnected account: {self.name}")
             logger.info(f"Disconnected account: {self.name}")
             self.client = None  # Clear client after disconnection
 
-    async def process_channels(self, required_channels: List[str]) -> None:
-        """Process channels: check join status against DB, join if needed, update DB with date_joined, and scrape messages, using a single connection."""
-        if not await self.connect():
+    async def process_channels(self, required_channels: List[str], joined_channels: set = None) -> None:
+        """Process channels: check join status against DB, join if needed, update DB with date_joined, and scrape messages, using a single connection.
+
+        Callers that already hold the joined-channel set (e.g. from the
+        accounts+channels JOIN) can pass it to skip the per-account query.
+        """
+        if not await self.ensure_connected():
             logger.error(f"Failed to connect account {self.name}. Skipping channel processing.")
             return
 
         try:
-            # Use the shared database connection
-            joined_channels_db = set(get_joined_channels(self.db_conn, self.name))
-            logger.info(f"Required channels: {required_channels}")
-            logger.info(f"Joined channels (Database): {joined_channels_db}")
-
-            # Check if database is up-to-date with required channels
-            missing_channels_db = [channel for channel in required_channels if channel not in joined_channels_db]
+            # Use the caller-provided set, then the instance cache, and only
+            # then fall back to the shared database connection
+            if joined_channels is not None:
+                joined_channels_db = set(joined_channels)
+            elif self._joined_cache is not None:
+                joined_channels_db = self._joined_cache
+            else:
+                joined_channels_db = set(get_joined_channels(self.db_conn, self.name))
+            # Later updates mutate this same set, so the cache stays in sync
+            self._joined_cache = joined_channels_db
+            # %-style defers formatting of these potentially large sets until
+            # the logging framework knows DEBUG is actually enabled
+            logger.debug("Required channels: %s", required_channels)
+            logger.debug("Joined channels (Database): %s", joined_channels_db)
+
+            # Check if database is up-to-date with required channels: one
+            # C-level set difference instead of a per-channel membership loop
+            missing_channels_db = list(dict.fromkeys(required_channels).keys() - joined_channels_db)
 
             if not missing_channels_db:
-                logger.debug(f"Database is up-to-date with required channels. Skipping Telegram fetch and joining.")
+                logger.debug("Database is up-to-date with required channels. Skipping Telegram fetch and joining.")
                 # Directly scrape 5 latest messages from each required channel
                 # for channel in required_channels:
                 #     messages = await self.scrape_messages(channel, limit=5)
                 #     logger.debug(f"5 latest messages from {channel} for {self.name}: {messages}")
             else:
-                logger.debug(f"Database lacks {len(missing_channels_db)} channels. Fetching from Telegram and verify missing channels.")
+                logger.debug("Database lacks %d channels. Fetching from Telegram and verify missing channels.", len(missing_channels_db))
 
                 # Fetch joined channels from Telegram to verify and update database
                 joined_channels_telegram = await self.get_joined_channels()
-                logger.info(f"Joined channels (Telegram): {joined_channels_telegram}")
+                logger.debug("Joined channels (Telegram): %s", joined_channels_telegram)
+
+                # Record every missing channel in a single transaction instead
+                # of one commit per row, then update the in-memory set once
+                add_channels(self.db_conn, self.name, missing_channels_db)
+                joined_channels_db.update(missing_channels_db)
+                logger.debug("Verified and added %d channels to database for %s", len(missing_channels_db), self.name)
 
                 for channel in missing_channels_db:
-                    # if channel are not only on db but also on telegram, join account to channel in telegram and add channel to db
+                    # if channel is not joined on telegram yet, hand the join to
+                    # the background worker; its pacing delay no longer blocks this loop
                     if channel not in joined_channels_telegram:
-                        add_channel(self.db_conn, self.name, channel)
-                        logger.debug(f"Verified and added {channel} to database for {self.name}")
-                        joined_channels_db.add(channel)
-                        try:
-                            await self.join_channel(channel)
-                            logger.info(f"Joined {channel} for account {self.name}")
-                        except Exception as e:
-                            logger.error(f"Failed to join {channel} for {self.name}: {e}")
-                            continue
-                    else:
-                        add_channel(self.db_conn, self.name, channel)
-                        logger.debug(f"Verified and added {channel} to database for {self.name}")
-                        joined_channels_db.add(channel)
+                        self.queue_join(channel)
 
                 # Scrape 5 latest messages from all required channels after updates
                 # for channel in required_channels:
@@ -150,57 +247,162 @@ class Account:
 
     async def join_channel(self, channel: str) -> None:
         """Join a Telegram channel and update the database using Telethon with date_joined."""
-        logger.debug(f"Calling join_channel for {self.name} on channel {channel} using Telethon")
+        logger.debug("Calling join_channel for %s on channel %s using Telethon", self.name, channel)
         await self.client(JoinChannelRequest(channel))
         add_channel(self.db_conn, self.name, channel)
         await asyncio.sleep(random.uniform(3, 7))  # Random delay
 
+    def queue_join(self, channel: str) -> None:
+        """Schedule a channel join on the background worker and return immediately.
+
+        The worker spaces joins with the same randomized delay, but the delay
+        no longer stalls the caller's loop.
+        """
+        if self._join_queue is None:
+            self._join_queue = asyncio.Queue()
+            self._join_worker_task = asyncio.create_task(self._join_worker())
+        self._join_queue.put_nowait(channel)
+
+    async def _join_worker(self) -> None:
+        """Drain queued joins one at a time, pacing them to avoid FloodWait."""
+        while True:
+            channel = await self._join_queue.get()
+            try:
+                # The channel row is already recorded by the batched insert in
+                # process_channels; only the Telegram join happens here
+                await self.client(JoinChannelRequest(channel))
+                logger.info(f"Joined {channel} for account {self.name}")
+            except Exception as e:
+                logger.error(f"Failed to join {channel} for {self.name}: {e}")
+            await asyncio.sleep(random.uniform(3, 7))  # Random delay between joins
+
     async def get_joined_channels(self) -> List[str]:
         """Retrieve joined channels from Telegram using Telethon."""
-        logger.debug(f"Fetching joined channels for {self.name} using Telethon")
+        logger.debug("Fetching joined channels for %s using Telethon", self.name)
         joined_channels = []
-        async for dialog in self.client.iter_dialogs():
+        # iter_dialogs already carries the full entity; reading dialog.entity
+        # avoids one get_entity round-trip per dialog. Migrated and archived
+        # dialogs can never be scrape targets, so skip fetching them at all.
+        # Pinned dialogs must stay included: a pinned scrape target is still
+        # a joined channel
+        async for dialog in self.client.iter_dialogs(limit=None,
+                                                     ignore_migrated=True, archived=False):
             if dialog.is_group or dialog.is_channel:
-                entity = await self.client.get_entity(dialog.id)
-                if hasattr(entity, 'username') and entity.username:
-                    joined_channels.append(entity.username)
-        logger.debug(f"Joined channels for {self.name}: {joined_channels}")
+                username = getattr(dialog.entity, 'username', None)
+                if username:
+                    joined_channels.append(username)
+        logger.debug("Joined channels for %s: %s", self.name, joined_channels)
         return joined_channels
 
-    async def scrape_messages(self, channel: str, limit: int = 5) -> List[dict]:
-        """Scrape the 5 latest messages from a channel using Telethon."""
-        logger.debug(f"Attempting to scrape {limit} latest messages from {channel} with account {self.name} using Telethon")
+    async def iter_scraped(self, channel: str, limit: int = 5):
+        """Stream messages from a channel as dicts, one at a time.
+
+        Avoids materializing the whole batch so slow consumers apply
+        backpressure instead of buffering every message up front.
+        """
+        logger.debug("Attempting to scrape %d latest messages from %s with account %s using Telethon", limit, channel, self.name)
         if self.is_banned:
             logger.warning(f"Account {self.name} is banned, skipping scrape for {channel}")
-            return []
+            return
 
         try:
-            # Fetch the 5 latest messages
-            messages = await self.client(GetHistoryRequest(
-                peer=channel,
-                limit=limit,
-                offset_date=None,
-                offset_id=0,
-                max_id=0,
-                min_id=0,
-                add_offset=0,
-                hash=0
-            ))
-            logger.debug(f"Scraped {len(messages.messages)} messages from {channel} for {self.name} using Telethon: {messages.messages}")
-            return [{'id': msg.id, 'text': msg.message, 'date': msg.date} for msg in messages.messages if msg.message]
+            if self.limiter:
+                await self.limiter.acquire()
+            async with self._scrape_sem:
+                # iter_messages goes through Telethon's entity cache, so the
+                # channel username is not re-resolved on every call
+                async for msg in self.client.iter_messages(channel, limit=limit):
+                    if msg.message:
+                        yield dict(zip(_MSG_KEYS, _MSG_FIELDS(msg)))
+        except FloodWaitError as e:
+            # Temporary throttle, not a ban: honor the server-advertised wait
+            # and pause everyone sharing this proxy in lockstep
+            logger.warning(f"{self.name} flood wait {e.seconds}s on {channel}")
+            if self.limiter:
+                self.limiter.pause(e.seconds)
+            await asyncio.sleep(e.seconds)
+        except UserBannedInChannelError as e:
+            logger.error(f"{self.name} banned in {channel}: {e}")
+            update_account_status(self.db_conn, self.name, 'banned')
+            self.is_banned = True
+            self._status_cache = ('banned', time.monotonic())
+        except ChannelPrivateError:
+            logger.warning(f"Channel {channel} is private or inaccessible for {self.name}")
         except Exception as e:
-            error_msg = str(e)
-            if 'FloodWait' in error_msg or 'UserBannedInChannel' in error_msg:
-                logger.error(f"{self.name} banned or flood limited: {error_msg}")
-                update_account_status(self.db_conn, self.name, 'banned')
-                self.is_banned = True
+            logger.error(f"{self.name} failed to scrape {channel}: {e}")
+
+    async def scrape_messages(self, channel: str, limit: int = 5) -> List[dict]:
+        """Scrape the latest messages from a channel, materialized as a list."""
+        messages = [message async for message in self.iter_scraped(channel, limit)]
+        logger.debug("Scraped %d messages from %s for %s using Telethon", len(messages), channel, self.name)
+        return messages
+
+    async def prime_entities(self, channels: List[str]) -> None:
+        """Warm Telethon's entity cache so later scrapes are pure InputPeer dispatches."""
+        for channel in channels:
+            try:
+                await self.client.get_input_entity(channel)
+            except Exception as e:
+                logger.debug("Could not prime entity for %s: %s", channel, e)
+
+    async def scrape_all(self, channels: List[str], limit: int = 5) -> Dict[str, List[dict]]:
+        """Scrape many channels concurrently; the per-account semaphore caps in-flight fetches."""
+        results = await asyncio.gather(*(self.scrape_messages(channel, limit) for channel in channels),
+                                       return_exceptions=True)
+        messages = {}
+        for channel, result in zip(channels, results):
+            if isinstance(result, Exception):
+                logger.error(f"{self.name} failed to scrape {channel}: {result}")
+                messages[channel] = []
             else:
-                logger.error(f"{self.name} failed to scrape {channel}: {e}")
-            return []
+                messages[channel] = result
+        return messages
+
+    STATUS_TTL = 1.0  # seconds a cached status stays fresh
+
+    async def scrape_channels(self, channels: List[str], dispatch, limit: int = 5,
+                              max_concurrent: int = 8, queue_size: int = 1024) -> None:
+        """Scrape many channels through a bounded producer/consumer pipeline.
+
+        One producer per channel (at most max_concurrent in flight, staying
+        under Telegram's per-connection limits) fills a bounded queue; a
+        dispatcher coroutine drains it and hands each message to the dispatch
+        callable, overlapping network latency with downstream publish latency.
+        """
+        await self.prime_entities(channels)
+        queue = asyncio.Queue(maxsize=queue_size)
+        semaphore = asyncio.Semaphore(max_concurrent)
+        done = object()  # Sentinel to close the dispatcher
+
+        async def producer(channel: str) -> None:
+            async with semaphore:
+                async for message in self.iter_scraped(channel, limit=limit):
+                    await queue.put((channel, message))
+
+        async def dispatcher() -> None:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                channel, message = item
+                dispatch(channel, message)
+
+        consumer = asyncio.create_task(dispatcher())
+        await asyncio.gather(*(producer(channel) for channel in channels))
+        await queue.put(done)
+        await consumer
 
     def get_status(self) -> str:
-        """Get account status from the database."""
-        return get_account_status(self.db_conn, self.name)
+        """Get account status, cached briefly so logging/__str__ doesn't query per call."""
+        if self.is_banned:
+            # Bans are sticky; no database read can unset this flag mid-run
+            return 'banned'
+        status, ts = self._status_cache
+        if status is not None and time.monotonic() - ts < self.STATUS_TTL:
+            return status
+        status = get_account_status(self.db_conn, self.name)
+        self._status_cache = (status, time.monotonic())
+        return status
 
     def __str__(self) -> str:
         """String representation of the account."""
@@ -211,6 +413,11 @@ class Account:
 
 class AccountManager:
     """Manages multiple Telegram accounts with queue-based usage and real-time channel updates."""
+
+    # Per-account state flags packed into a bytearray mask
+    STATE_ACTIVE = 0
+    STATE_BANNED = 1
+
     def __init__(self, resources_dir: str, db_path: str, proxy_pool: List[Dict] = None, email_config: Dict = None):
         """
         Initialize the AccountManager.
@@ -229,20 +436,40 @@ class AccountManager:
 
         self.resources_dir = resources_dir
         self.db_path = db_path
+        self._loop = None  # Running loop, captured by async entry points for thread handoff
         self.proxy_pool = proxy_pool or []
+        self._proxy_sems = {}  # (type, host, port) -> semaphore shared by accounts on that proxy
+        self._limiters = {}  # (type, host, port) -> RateLimiter pacing requests through that proxy
         self.email_config = email_config
-        self.account_queue = asyncio.Queue()
+        self._rr = deque()  # Round-robin over accounts; O(1) rotate, no queue awaits
         self.db_conn = init_db(db_path, accounts_file_path)
-        self.accounts = self._load_accounts(accounts_file_path)
+        # One bulk status query seeds every account's ban flag, replacing a
+        # per-account SELECT in each Account constructor
+        active_names = get_active_account_names(self.db_conn)
+        self.accounts = self._load_accounts(accounts_file_path, active_names)
         self.required_channels = self._load_channels(channel_file_path)
-
-        for account in self.accounts:
-            self.account_queue.put_nowait(account)
-        logger.debug(f"Loaded accounts: {[acc.name for acc in self.accounts]}")
+        self._channels_fingerprint = self._fingerprint(self.required_channels)
+
+        # In-memory account states: one byte per account indexed by position,
+        # hydrated once from the DB and mutated on status changes, so account
+        # selection never has to query per call and stays cache-friendly even
+        # for large pools
+        self._account_index = {acc.name: i for i, acc in enumerate(self.accounts)}
+        # Seed from each account's ban flag rather than active_names directly:
+        # when the bulk query failed (active_names is None) the constructors
+        # already fell back to per-account status lookups
+        self._state = bytearray(
+            self.STATE_BANNED if acc.is_banned else self.STATE_ACTIVE
+            for acc in self.accounts
+        )
+
+        self._rr.extend(self.accounts)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Loaded accounts: %s", [acc.name for acc in self.accounts])
         
 
-    def _load_accounts(self, accounts_file_path: str) -> List[Account]:
-        """Load accounts from JSON file, optionally assigning proxies."""
+    def _load_accounts(self, accounts_file_path: str, active_names: set = None) -> List[Account]:
+        """Load accounts from JSON file, optionally assigning proxies and pre-seeded ban state."""
         logger.debug(f"Loading accounts from {accounts_file_path}")
         accounts = []
         try:
@@ -250,19 +477,30 @@ class AccountManager:
                 logger.error(f"Accounts file {accounts_file_path} does not exist")
                 return accounts
 
-            with open(accounts_file_path, 'r') as f:
-                data = json.load(f)
+            data = _load_json_cached(accounts_file_path, os.stat(accounts_file_path).st_mtime_ns)
             for i, acc in enumerate(data['accounts']):
                 proxy = self.proxy_pool[i % len(self.proxy_pool)] if self.proxy_pool else None
+                # One shared semaphore per proxy endpoint bounds concurrent
+                # handshakes through the same link
+                connect_sem = None
+                limiter = None
+                if proxy:
+                    proxy_key = (proxy.get('type', 'http'), proxy['host'], proxy['port'])
+                    connect_sem = self._proxy_sems.setdefault(proxy_key, asyncio.Semaphore(4))
+                    limiter = self._limiters.setdefault(proxy_key, RateLimiter(rate=1.0, burst=5))
                 logger.debug(f"Creating account for {acc['session']} with proxy={proxy}")
+                name = acc['session'].split('.')[0]
                 accounts.append(Account(
                     session_file=acc['session'],  # Use relative path within resources/sessions/
-                    name=acc['session'].split('.')[0],
+                    name=name,
                     api_id=acc['api_id'],
                     api_hash=acc['api_hash'],
                     db_path=self.db_path,
                     proxy=proxy,
-                    db_conn=self.db_conn
+                    db_conn=self.db_conn,
+                    connect_sem=connect_sem,
+                    limiter=limiter,
+                    is_banned=None if active_names is None else name not in active_names
                 ))
             return accounts
         except json.JSONDecodeError as e:
@@ -280,8 +518,9 @@ class AccountManager:
                 logger.error(f"Channels file {channels_file_path} does not exist")
                 return []
 
-            with open(channels_file_path, 'r') as f:
-                return json.load(f)
+            channels = _load_json_cached(channels_file_path, os.stat(channels_file_path).st_mtime_ns)
+            # Deduplicate once here so per-account diffs never re-scan repeats
+            return list(dict.fromkeys(channels))
         except json.JSONDecodeError as e:
             logger.error(f"JSON error loading channels: {e}")
             return []
@@ -289,23 +528,114 @@ class AccountManager:
             logger.error(f"Error loading channels: {e}")
             return []
 
+    async def warm_up(self, max_concurrent: int = 8) -> None:
+        """Connect all accounts concurrently with bounded concurrency.
+
+        Warm-up time drops from O(N x RTT) to O(RTT) up to the semaphore limit;
+        the bound keeps simultaneous MTProto handshakes below Telegram's
+        soft-ban threshold.
+        """
+        logger.debug(f"Warming up {len(self.accounts)} accounts (max {max_concurrent} concurrent)")
+        semaphore = asyncio.Semaphore(max_concurrent)
+
+        async def _connect_one(account: 'Account') -> None:
+            async with semaphore:
+                await account.connect()
+
+        await asyncio.gather(*(_connect_one(account) for account in self.accounts))
+
+    async def _process_all(self) -> None:
+        """Fan process_channels out across every active account concurrently.
+
+        Aggregate throughput scales with account count; the semaphore is sized
+        to the proxy pool so connections saturate proxies rather than one link.
+        """
+        self._loop = asyncio.get_running_loop()
+        joined_map = get_active_accounts_with_channels(self.db_conn)
+        active = [acc for acc in self.accounts
+                  if self._state[self._account_index[acc.name]] == self.STATE_ACTIVE]
+        logger.debug(f"Processing channels on {len(active)} active accounts")
+        semaphore = asyncio.Semaphore(len(self.proxy_pool) or 4)
+
+        async def _one(account: 'Account') -> None:
+            async with semaphore:
+                await account.process_channels(self.required_channels, joined_map.get(account.name))
+
+        results = await asyncio.gather(*(_one(acc) for acc in active), return_exceptions=True)
+        for account, result in zip(active, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error processing channels for {account.name}: {result}")
+
+    def start_channel_watcher(self):
+        """Watch channels.json for edits and reprocess accounts on real changes.
+
+        Watchdog is imported here, not at module top, so short-lived scrape
+        runs that never start a watcher skip its import cost entirely.
+        """
+        from watchdog.observers import Observer
+        from channel_watcher import ChannelFileHandler
+
+        channels_path = os.path.join(self.resources_dir, "channels.json")
+        observer = Observer()
+        observer.schedule(ChannelFileHandler(self, channels_path), path=self.resources_dir, recursive=False)
+        observer.start()
+        self._observer = observer
+        logger.debug(f"Watching {channels_path} for channel updates")
+        return observer
+
+    async def _reload_and_process(self) -> None:
+        """Reload channels.json off the event loop, then reprocess all accounts.
+
+        The blocking read+parse runs in a worker thread so the loop keeps
+        serving scrape traffic during reloads.
+        """
+        self._loop = asyncio.get_running_loop()
+        channel_file_path = os.path.join(self.resources_dir, "channels.json")
+        channels = await asyncio.to_thread(self._load_channels, channel_file_path)
+        # Second-level filter behind the watcher's content hash: a reordered
+        # or reformatted file parses to the same channel set, and a no-op
+        # reload would replay the same Telegram round-trips on every account
+        fingerprint = self._fingerprint(channels)
+        if fingerprint == self._channels_fingerprint:
+            logger.debug("channels.json reloaded with no semantic change; skipping reprocess")
+            return
+        self._channels_fingerprint = fingerprint
+        self.required_channels = channels
+        await self._process_all()
+
+    @staticmethod
+    def _fingerprint(channels: List[str]) -> bytes:
+        """Order-insensitive digest of a channel list for change detection."""
+        return hashlib.blake2b(b"\0".join(sorted(c.encode() for c in channels)),
+                               digest_size=16).digest()
+
     async def _test_channels(self) -> None:
-        """Test connecting to the account, checking joined channels against DB, joining unjoined channels, and crawling 5 latest messages."""
-        logger.debug(f"Testing channels for accounts: {[acc.name for acc in self.accounts]}")
-        account = await self.get_active_account()
-        await account.process_channels(self.required_channels)
+        """Test connecting to accounts, checking joined channels against DB, joining unjoined channels, and crawling 5 latest messages.
+
+        Every active account's work is independent network I/O, so they run
+        concurrently through _process_all instead of serializing on a single
+        account pulled from the rotation; the round-robin deque stays as the
+        authoritative ban-tracking structure for callers that need one account.
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Testing channels for accounts: %s", [acc.name for acc in self.accounts])
+        await self._process_all()
 
     async def get_active_account(self) -> 'Account':
         """Get the next active account from the queue."""
-        logger.debug("Getting active account from queue")
-        while not self.account_queue.empty():
-            account = await self.account_queue.get()
-            logger.debug(f"Checking account {account.name} from queue")
-            if account.get_status() != 'banned':
-                await self.account_queue.put(account)  # Return to queue
-                logger.debug(f"Returning active account: {account.name}")
+        logger.debug("Getting active account from round-robin deque")
+        while self._rr:
+            account = self._rr.popleft()
+            logger.debug("Checking account %s from deque", account.name)
+            if account.is_banned:
+                # The account banned itself mid-scrape; keep the state mask in sync
+                self._state[self._account_index[account.name]] = self.STATE_BANNED
+            if self._state[self._account_index[account.name]] == self.STATE_ACTIVE:
+                self._rr.append(account)  # Rotate to the back for round-robin
+                logger.debug("Returning active account: %s", account.name)
                 return account
             else:
+                # Banned accounts drop out of the rotation for good
                 logger.warning(f"Account {account.name} is banned")
                 if self.email_config:
                     from utils.email_utils import send_ban_notification
@@ -316,6 +646,17 @@ class AccountManager:
         logger.error("All accounts banned!")
         raise RuntimeError("No available accounts")
 
+    def mark_banned(self, account: 'Account') -> None:
+        """Record a ban in both the database and the in-memory state mask."""
+        update_account_status(self.db_conn, account.name, 'banned')
+        account.is_banned = True
+        self._state[self._account_index[account.name]] = self.STATE_BANNED
+
+    async def aclose(self) -> None:
+        """Disconnect all accounts at shutdown; clients stay alive for the process lifetime otherwise."""
+        for account in self.accounts:
+            await account.disconnect()
+
     def __del__(self):
         """Clean up by closing the database connection when the manager is destroyed."""
         if hasattr(self, 'db_conn') and self.db_conn:
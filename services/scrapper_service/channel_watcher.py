@@ -0,0 +1,70 @@
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from typing import Optional
+
+from watchdog.events import PatternMatchingEventHandler
+
+logger = logging.getLogger(__name__)
+
+class ChannelFileHandler(PatternMatchingEventHandler):
+    """Debounced watcher for channels.json: one reload per save burst.
+
+    Editors emit several modify events per save (truncate, write, flush), so
+    a trailing timer coalesces them and a content hash skips reloads when the
+    file didn't semantically change. The pattern filter drops events for
+    unrelated files in resources/ before they reach Python.
+
+    Lives in its own module so importing account_manager doesn't pay the
+    watchdog import (platform inotify extensions) unless the watcher starts.
+    """
+
+    DEBOUNCE = 0.5  # seconds
+
+    def __init__(self, manager, channels_path: str):
+        self.channels_path = os.path.abspath(channels_path)
+        super().__init__(patterns=[self.channels_path], ignore_directories=True)
+        self.manager = manager
+        self._timer: Optional[threading.Timer] = None
+        self._last_mtime_ns = self._stat_mtime()
+        self._last_hash = self._hash_file()
+
+    def _stat_mtime(self) -> Optional[int]:
+        try:
+            return os.stat(self.channels_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _hash_file(self) -> Optional[str]:
+        try:
+            with open(self.channels_path, 'rb') as f:
+                return hashlib.md5(f.read()).hexdigest()
+        except OSError:
+            return None
+
+    def on_modified(self, event) -> None:
+        if self._timer:
+            self._timer.cancel()
+        self._timer = threading.Timer(self.DEBOUNCE, self._trigger)
+        self._timer.start()
+
+    def _trigger(self) -> None:
+        # Cheap stat first: events fired without an mtime tick (editor noise)
+        # are dropped before the file is read and hashed at all
+        mtime_ns = self._stat_mtime()
+        if mtime_ns is not None and mtime_ns == self._last_mtime_ns:
+            logger.debug("channels.json modify event without mtime change; skipping reload")
+            return
+        self._last_mtime_ns = mtime_ns
+        new_hash = self._hash_file()
+        if new_hash == self._last_hash:
+            logger.debug("channels.json modify event without content change; skipping reload")
+            return
+        self._last_hash = new_hash
+        loop = self.manager._loop
+        if loop is None:
+            logger.warning("No running event loop yet; skipping channels.json reload")
+            return
+        asyncio.run_coroutine_threadsafe(self.manager._reload_and_process(), loop)
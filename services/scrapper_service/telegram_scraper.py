@@ -2,7 +2,7 @@ import asyncio
 import logging
 from account_manager import AccountManager, Account
 from telethon import events
-from utils.db_utils import get_joined_channels
+from utils.db_utils import get_joined_channels_set
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -14,8 +14,10 @@ async def handle_new_messages(account: 'Account', channel: str) -> None:
     async def new_message_handler(event):
         message = event.message
         if message and message.text:
-            logger.debug(f"New message in {channel} for account {account.name}: "
-                         f"ID={message.id}, Text='{message.text}', Date={message.date}")
+            # %-style so the (potentially multi-KB) message body is only
+            # formatted when DEBUG records actually pass the filter
+            logger.debug("New message in %s for account %s: ID=%s, Text=%r, Date=%s",
+                         channel, account.name, message.id, message.text, message.date)
 
 async def main():
     """Main function to initialize AccountManager, join channels, and listen for new messages from joined channels."""
@@ -34,13 +36,13 @@ async def main():
         await account.process_channels(manager.required_channels)
 
         # Get joined channels from the database
-        joined_channels = set(get_joined_channels(account.db_conn, account.name))
-        logger.info(f"Joined channels for {account.name}: {joined_channels}")
+        joined_channels = get_joined_channels_set(account.db_conn, account.name)
+        logger.info("Joined channels for %s: %s", account.name, joined_channels)
 
         # Set up listeners for new messages in each joined channel
         for channel in joined_channels:
             await handle_new_messages(account, channel)
-            logger.debug(f"Listening for new messages in channel {channel} for account {account.name}")
+            logger.debug("Listening for new messages in channel %s for account %s", channel, account.name)
 
         # Keep the script running to listen for updates (you can interrupt with Ctrl+C)
         try:
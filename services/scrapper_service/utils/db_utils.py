@@ -2,12 +2,54 @@ import sqlite3
 import json
 import os
 import logging
+import time
 from pathlib import Path
-from typing import List
-import datetime
+from typing import List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Canonical SQL for the hot helpers, defined once so sqlite3's statement
+# cache (keyed by string identity) hits on every call instead of re-parsing
+SQL_GET_STATUS = "SELECT status FROM accounts WHERE phone = ?"
+# The status <> ? predicate turns same-value updates into no-ops, so the
+# common "still active" call writes nothing to the WAL
+SQL_UPD_STATUS = "UPDATE accounts SET status = ? WHERE phone = ? AND status <> ?"
+# OR IGNORE: a conflicting row is left untouched, so repeat joins cost no
+# delete+reinsert B-tree churn and the original date_joined survives
+SQL_INS_CHANNEL = "INSERT OR IGNORE INTO channels (phone, channel) VALUES (?, ?)"
+SQL_LIST_CHANNELS = "SELECT channel FROM channels WHERE phone = ?"
+# Crawl locks carry no durability requirement (they are recreated from
+# activity after a restart), so SECGRAM_MEM_LOCKS=1 moves them to an attached
+# in-memory schema and the hot lock path stops touching the WAL entirely.
+# Only valid while every scraper shares one process; cross-process
+# coordination needs the on-disk table.
+MEM_LOCKS = os.environ.get('SECGRAM_MEM_LOCKS') == '1'
+_LOCKS_TABLE = 'mem.crawl_locks' if MEM_LOCKS else 'crawl_locks'
+
+SQL_EXPIRE_LOCK = f"DELETE FROM {_LOCKS_TABLE} WHERE channel = ? AND locked_at < ?"
+SQL_CHECK_LOCK = f"SELECT 1 FROM {_LOCKS_TABLE} WHERE channel = ?"
+# INSERT...SELECT claims the lock and verifies channel membership in one
+# statement; OR IGNORE keeps a live lock held by another scraper intact
+SQL_TAKE_LOCK = f"""
+    INSERT OR IGNORE INTO {_LOCKS_TABLE} (channel, locked_by, locked_at)
+    SELECT ?, ?, ? FROM channels WHERE phone = ? AND channel = ?
+"""
+SQL_RELEASE_LOCK = f"DELETE FROM {_LOCKS_TABLE} WHERE channel = ? AND locked_by = ?"
+
+# Seconds before a crawl lock left by a dead scraper is considered stale
+LOCK_TIMEOUT = 300
+
+# Wall-clock second cached against the monotonic clock: lock bookkeeping only
+# needs second resolution, so hot callers skip a clock_gettime syscall per op
+_now_cache = [0, 0.0]  # [cached epoch second, monotonic stamp of the refresh]
+
+def now_s() -> int:
+    """Current epoch second, refreshed at most every 250ms."""
+    t = time.monotonic()
+    if t - _now_cache[1] > 0.25:
+        _now_cache[:] = [int(time.time()), t]
+    return _now_cache[0]
+
 def init_db(db_path: str, accounts_file: str) -> sqlite3.Connection:
     """Initialize the SQLite database and create tables if they don't exist, returning a shared connection."""
     try:
@@ -16,9 +58,26 @@ def init_db(db_path: str, accounts_file: str) -> sqlite3.Connection:
             logger.info(f"Database {db_path} does not exist. Creating it...")
             Path(db_path).touch()
         
-        db_conn = sqlite3.connect(db_path)
+        # check_same_thread=False lets the shared connection serve both the
+        # event loop and helper threads; SQLite itself serializes access.
+        # The enlarged statement cache keeps every hot query's prepared form
+        # resident, so repeated helper calls skip sqlite3_prepare entirely
+        db_conn = sqlite3.connect(db_path, check_same_thread=False, cached_statements=256)
         cursor = db_conn.cursor()
 
+        # WAL lets readers run concurrently with the single writer, and the
+        # relaxed sync level cuts the fsync cost of each commit
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-64000")
+        # Writers from other processes back off and retry instead of failing
+        # immediately with "database is locked"
+        cursor.execute("PRAGMA busy_timeout=10000")
+        # Memory-map up to 256MB of the file so warm reads bypass the
+        # read() syscall and share pages across connections
+        cursor.execute("PRAGMA mmap_size=268435456")
+
         # Create accounts table
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS accounts (
@@ -29,33 +88,52 @@ def init_db(db_path: str, accounts_file: str) -> sqlite3.Connection:
             )
         """)
 
-        # Create channels table with date_joined
+        # Create channels table with date_joined as integer unix-ms: the
+        # default is computed inside SQLite (no Python datetime or adapter on
+        # the write path) and the stored value is an 8-byte int instead of a
+        # 27-char ISO string. Read back with datetime.fromtimestamp(ms/1000)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS channels (
                 phone TEXT,
                 channel TEXT,
-                date_joined DATETIME DEFAULT CURRENT_TIMESTAMP,
+                date_joined INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER) * 1000),
                 PRIMARY KEY (phone, channel),
                 FOREIGN KEY (phone) REFERENCES accounts(phone)
             )
         """)
 
+        # Create crawl_locks table so concurrent scrapers can claim a channel
+        # before crawling it instead of duplicating each other's work
+        if MEM_LOCKS:
+            cursor.execute("ATTACH ':memory:' AS mem")
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {_LOCKS_TABLE} (
+                channel TEXT PRIMARY KEY,
+                locked_by TEXT,
+                locked_at INTEGER
+            )
+        """)
+
         db_conn.commit()
         cursor.close()
 
         # Load accounts from JSON if file exists and not already in DB
         if os.path.exists(accounts_file):
-            cursor = db_conn.cursor()
             with open(accounts_file, 'r') as f:
-                accounts_data = json.load(f)
-            for account in accounts_data['accounts']:
-                phone = account['session'].split('.')[0]
-                cursor.execute("SELECT COUNT(*) FROM accounts WHERE phone = ?", (phone,))
-                if cursor.fetchone()[0] == 0:  # Only insert if not already present
-                    cursor.execute("INSERT OR REPLACE INTO accounts (phone, api_id, api_hash, status) VALUES (?, ?, ?, 'active')",
-                                  (phone, account['api_id'], account['api_hash']))
-            db_conn.commit()
-            cursor.close()
+                accounts_json = f.read()
+            # One INSERT...SELECT over json_each ingests the whole document in
+            # a single VDBE program: no Python-side parse, no per-row binding
+            # crossings, one commit. OR IGNORE keeps existing rows' status
+            with db_conn:
+                db_conn.execute("""
+                    INSERT OR IGNORE INTO accounts (phone, api_id, api_hash, status)
+                    SELECT substr(json_extract(value, '$.session'), 1,
+                                  instr(json_extract(value, '$.session'), '.') - 1),
+                           json_extract(value, '$.api_id'),
+                           json_extract(value, '$.api_hash'),
+                           'active'
+                    FROM json_each(?, '$.accounts')
+                """, (accounts_json,))
             logger.info("Accounts loaded from accounts.json into database")
         else:
             logger.error(f"Accounts file {accounts_file} does not exist")
@@ -71,14 +149,35 @@ def init_db(db_path: str, accounts_file: str) -> sqlite3.Connection:
         logger.error(f"Error initializing database: {e}")
         raise
 
-def get_account_status(db_conn: sqlite3.Connection, phone: str) -> str:
-    """Get the status of an account from the database using the shared connection."""
+# Status rarely changes (only on ban), so polling callers can opt into a TTL
+# cache; update_account_status writes through so a ban is visible immediately
+_status_cache = {}  # phone -> (status, monotonic timestamp)
+
+def _exec(db_conn: sqlite3.Connection, sql: str, params=()) -> sqlite3.Cursor:
+    """Run one statement in its own committed transaction on the shared connection.
+
+    Collapses the cursor/execute/commit/close boilerplate every write helper
+    repeated; 'with db_conn' commits on success and rolls back on error.
+    """
+    with db_conn:
+        return db_conn.execute(sql, params)
+
+def get_account_status(db_conn: sqlite3.Connection, phone: str, ttl: float = 0.0) -> str:
+    """Get the status of an account from the database using the shared connection.
+
+    Pass ttl > 0 (seconds) to serve repeated polls from the write-through
+    cache instead of a query per call.
+    """
     try:
-        cursor = db_conn.cursor()
-        cursor.execute("SELECT status FROM accounts WHERE phone = ?", (phone,))
-        result = cursor.fetchone()
-        cursor.close()
-        return result[0] if result else 'active'
+        if ttl > 0:
+            cached = _status_cache.get(phone)
+            if cached is not None and time.monotonic() - cached[1] < ttl:
+                return cached[0]
+        # Connection.execute uses an internal cursor; no per-call allocation
+        result = db_conn.execute(SQL_GET_STATUS, (phone,)).fetchone()
+        status = result[0] if result else 'active'
+        _status_cache[phone] = (status, time.monotonic())
+        return status
     except sqlite3.Error as e:
         logger.error(f"SQLite error getting status for {phone}: {e}")
         return 'active'
@@ -86,16 +185,53 @@ def get_account_status(db_conn: sqlite3.Connection, phone: str) -> str:
         logger.error(f"Error getting status for {phone}: {e}")
         return 'active'
 
+def get_active_account_names(db_conn: sqlite3.Connection) -> Optional[set]:
+    """Get the set of non-banned account phones in a single query using the shared connection.
+
+    Returns None when the query fails so callers fall back to their per-account
+    status path instead of treating every account as banned.
+    """
+    try:
+        cursor = db_conn.execute("SELECT phone FROM accounts WHERE status = 'active'")
+        return {row[0] for row in cursor}
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error getting active accounts: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"Error getting active accounts: {e}")
+        return None
+
+def get_active_accounts_with_channels(db_conn: sqlite3.Connection) -> dict:
+    """Get every active account and its joined-channel set in a single JOIN query."""
+    try:
+        cursor = db_conn.execute("""
+            SELECT a.phone, c.channel
+            FROM accounts a
+            LEFT JOIN channels c ON c.phone = a.phone
+            WHERE a.status = 'active'
+        """)
+        accounts = {}
+        for phone, channel in cursor:
+            joined = accounts.setdefault(phone, set())
+            if channel is not None:
+                joined.add(channel)
+        return accounts
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error getting accounts with channels: {e}")
+        return {}
+    except Exception as e:
+        logger.error(f"Error getting accounts with channels: {e}")
+        return {}
+
 def update_account_status(db_conn: sqlite3.Connection, phone: str, status: str) -> None:
     """Update the status of an account in the database using the shared connection."""
     if status not in ['active', 'banned']:
         raise ValueError("Status must be 'active' or 'banned'")
     try:
-        cursor = db_conn.cursor()
-        cursor.execute("UPDATE accounts SET status = ? WHERE phone = ?", (status, phone))
-        db_conn.commit()
-        cursor.close()
-        logger.debug(f"Updated status for {phone} to {status}")
+        cursor = _exec(db_conn, SQL_UPD_STATUS, (status, phone, status))
+        _status_cache[phone] = (status, time.monotonic())
+        if cursor.rowcount:
+            logger.debug("Updated status for %s to %s", phone, status)
     except sqlite3.Error as e:
         logger.error(f"SQLite error updating status for {phone}: {e}")
         raise
@@ -106,13 +242,11 @@ def update_account_status(db_conn: sqlite3.Connection, phone: str, status: str)
 def add_channel(db_conn: sqlite3.Connection, phone: str, channel: str) -> None:
     """Add a channel for an account to the database with date_joined using the shared connection."""
     try:
-        cursor = db_conn.cursor()
-        date_joined = datetime.datetime.now(datetime.timezone.utc)
-        cursor.execute("INSERT OR REPLACE INTO channels (phone, channel, date_joined) VALUES (?, ?, ?)",
-                      (phone, channel, date_joined))
-        db_conn.commit()
-        cursor.close()
-        logger.debug(f"Added channel {channel} with date_joined {date_joined} for {phone} to database")
+        # date_joined falls back to the column's integer unix-ms default
+        # (computed by SQLite via strftime), saving a Python datetime
+        # allocation and adapter round-trip per row
+        _exec(db_conn, SQL_INS_CHANNEL, (phone, channel))
+        logger.debug("Added channel %s for %s to database", channel, phone)
     except sqlite3.Error as e:
         logger.error(f"SQLite error adding channel {channel} for {phone}: {e}")
         raise
@@ -120,14 +254,28 @@ def add_channel(db_conn: sqlite3.Connection, phone: str, channel: str) -> None:
         logger.error(f"Error adding channel {channel} for {phone} to database: {e}")
         raise
 
+def add_channels(db_conn: sqlite3.Connection, phone: str, channels: List[str]) -> None:
+    """Add many channels for an account in one transaction (one fsync) using the shared connection."""
+    try:
+        with db_conn:
+            db_conn.executemany(SQL_INS_CHANNEL,
+                                [(phone, channel) for channel in channels])
+        logger.debug("Added %d channels for %s to database in one batch", len(channels), phone)
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error adding channels for {phone}: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Error adding channels for {phone} to database: {e}")
+        raise
+
 def get_joined_channels(db_conn: sqlite3.Connection, phone: str) -> List[str]:
     """Get the list of joined channels for an account from the database using the shared connection."""
     try:
+        # A scalar row factory makes fetchall return the channel strings
+        # directly: the row loop runs in C and no per-row tuple is allocated
         cursor = db_conn.cursor()
-        cursor.execute("SELECT channel FROM channels WHERE phone = ?", (phone,))
-        channels = [row[0] for row in cursor.fetchall()]
-        cursor.close()
-        return channels
+        cursor.row_factory = lambda cur, row: row[0]
+        return cursor.execute(SQL_LIST_CHANNELS, (phone,)).fetchall()
     except sqlite3.Error as e:
         logger.error(f"SQLite error getting joined channels for {phone}: {e}")
         return []
@@ -135,11 +283,105 @@ def get_joined_channels(db_conn: sqlite3.Connection, phone: str) -> List[str]:
         logger.error(f"Error getting joined channels for {phone}: {e}")
         return []
 
+def get_joined_channels_set(db_conn: sqlite3.Connection, phone: str) -> frozenset:
+    """Get the joined channels for an account as a frozenset for read-only membership checks.
+
+    Builds the set straight from the streaming cursor - no intermediate
+    list and no second set() pass in the caller.
+    """
+    try:
+        return frozenset(row[0] for row in db_conn.execute(SQL_LIST_CHANNELS, (phone,)))
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error getting joined channels for {phone}: {e}")
+        return frozenset()
+    except Exception as e:
+        logger.error(f"Error getting joined channels for {phone}: {e}")
+        return frozenset()
+
 def get_new_channels(db_conn: sqlite3.Connection, phone: str, required_channels: List[str]) -> List[str]:
-    """Get channels that the account hasn't joined yet, based on the database using the shared connection."""
+    """Get channels that the account hasn't joined yet, based on the database using the shared connection.
+
+    The membership filter runs inside SQLite via json_each, so only the
+    missing channels cross the driver boundary instead of the account's
+    whole joined list.
+    """
     try:
-        joined = set(get_joined_channels(db_conn, phone))
-        return [channel for channel in required_channels if channel not in joined]
+        cursor = db_conn.execute("""
+            SELECT value FROM json_each(?)
+            WHERE value NOT IN (SELECT channel FROM channels WHERE phone = ?)
+        """, (json.dumps(required_channels), phone))
+        return [row[0] for row in cursor]
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error getting new channels for {phone}: {e}")
+        return required_channels  # Fallback to all channels if error occurs
     except Exception as e:
         logger.error(f"Error getting new channels for {phone}: {e}")
-        return required_channels  # Fallback to all channels if error occurs
\ No newline at end of file
+        return required_channels  # Fallback to all channels if error occurs
+
+def is_channel_locked(db_conn: sqlite3.Connection, channel: str, timeout: int = LOCK_TIMEOUT) -> bool:
+    """Check whether a channel is currently claimed by a scraper, expiring stale locks first.
+
+    The expiry DELETE and the check run as two statements in one
+    transaction, so the stale-lock path costs a single commit and there is
+    no window where a dead scraper's lock blocks the channel forever.
+    """
+    try:
+        with db_conn:
+            db_conn.execute(SQL_EXPIRE_LOCK, (channel, now_s() - timeout))
+            return db_conn.execute(SQL_CHECK_LOCK, (channel,)).fetchone() is not None
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error checking lock for {channel}: {e}")
+        return True  # Fail closed: treat the channel as locked on error
+    except Exception as e:
+        logger.error(f"Error checking lock for {channel}: {e}")
+        return True  # Fail closed: treat the channel as locked on error
+
+def lock_channel(db_conn: sqlite3.Connection, phone: str, channel: str, timeout: int = LOCK_TIMEOUT) -> bool:
+    """Atomically claim a channel for one account; returns True when the lock was taken.
+
+    A single INSERT...SELECT both verifies the account actually has the
+    channel and writes the lock row, so there is no gap between the
+    membership check and the claim. Stale locks are expired in the same
+    transaction, all under one commit.
+    """
+    try:
+        with db_conn:
+            now = now_s()
+            db_conn.execute(SQL_EXPIRE_LOCK, (channel, now - timeout))
+            cursor = db_conn.execute(SQL_TAKE_LOCK,
+                                     (channel, phone, now, phone, channel))
+            return cursor.rowcount == 1
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error locking {channel} for {phone}: {e}")
+        return False
+    except Exception as e:
+        logger.error(f"Error locking {channel} for {phone}: {e}")
+        return False
+
+def remove_account(db_conn: sqlite3.Connection, phone: str) -> None:
+    """Remove an account and all of its channels and crawl locks in one transaction.
+
+    The three DELETEs share a single write transaction, so cleanup costs one
+    WAL commit/fsync and can never leave orphaned channel or lock rows behind.
+    """
+    try:
+        with db_conn:
+            db_conn.execute("DELETE FROM accounts WHERE phone = ?", (phone,))
+            db_conn.execute("DELETE FROM channels WHERE phone = ?", (phone,))
+            db_conn.execute(f"DELETE FROM {_LOCKS_TABLE} WHERE locked_by = ?", (phone,))
+        logger.debug("Removed account %s and its channels/locks from database", phone)
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error removing account {phone}: {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Error removing account {phone}: {e}")
+        raise
+
+def unlock_channel(db_conn: sqlite3.Connection, phone: str, channel: str) -> None:
+    """Release a crawl lock; only the holder's own lock is removed."""
+    try:
+        _exec(db_conn, SQL_RELEASE_LOCK, (channel, phone))
+    except sqlite3.Error as e:
+        logger.error(f"SQLite error unlocking {channel} for {phone}: {e}")
+    except Exception as e:
+        logger.error(f"Error unlocking {channel} for {phone}: {e}")
\ No newline at end of file
@@ -1,22 +1,63 @@
+import queue
 import smtplib
+import threading
 from email.mime.text import MIMEText
 import logging
 from typing import Dict
 
 logger = logging.getLogger(__name__)
 
+SMTP_HOST = 'smtp.gmail.com'
+SMTP_PORT = 587
+
+# One authenticated connection reused across notifications; ban bursts no
+# longer pay a TCP + STARTTLS + login handshake per mail
+_smtp = None
+
+def _get_smtp(email_config: Dict) -> smtplib.SMTP:
+    """Return a live authenticated SMTP connection, reconnecting if it went stale."""
+    global _smtp
+    if _smtp is not None:
+        try:
+            if _smtp.noop()[0] == 250:
+                return _smtp
+        except (smtplib.SMTPException, OSError):
+            pass  # Server dropped the idle connection; reconnect below
+    _smtp = smtplib.SMTP(SMTP_HOST, SMTP_PORT)
+    _smtp.starttls()
+    _smtp.login(email_config['sender'], email_config['password'])
+    return _smtp
+
+# Mail goes out on a background thread so a ban storm never blocks the
+# scraper on SMTP round-trips; the caller's cost is one queue put
+_mail_queue = None
+_mail_worker = None
+
+def _ensure_worker() -> 'queue.Queue':
+    """Start the daemon mail worker on first use and return its queue."""
+    global _mail_queue, _mail_worker
+    if _mail_worker is None or not _mail_worker.is_alive():
+        _mail_queue = queue.Queue()
+        _mail_worker = threading.Thread(target=_mail_loop, daemon=True, name='email-worker')
+        _mail_worker.start()
+    return _mail_queue
+
+def _mail_loop() -> None:
+    """Drain queued notifications over the shared SMTP connection."""
+    global _smtp
+    while True:
+        email_config, msg, account_name = _mail_queue.get()
+        try:
+            _get_smtp(email_config).send_message(msg)
+            logger.info(f"Email sent for {account_name}")
+        except Exception as e:
+            logger.error(f"Failed to send email: {e}")
+            _smtp = None  # Drop the cached connection so the next send reconnects
+
 def send_ban_notification(email_config: Dict, account_name: str) -> None:
-    """Send an email notification for banned accounts or all accounts banned."""
+    """Queue an email notification for banned accounts or all accounts banned."""
     msg = MIMEText(f"Account {account_name} has been banned or all accounts are banned.")
     msg['Subject'] = 'Telegram Account Ban Notification'
     msg['From'] = email_config['sender']
     msg['To'] = email_config['recipient']
-    
-    try:
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            server.starttls()
-            server.login(email_config['sender'], email_config['password'])
-            server.send_message(msg)
-        logger.info(f"Email sent for {account_name}")
-    except Exception as e:
-        logger.error(f"Failed to send email: {e}")
\ No newline at end of file
+    _ensure_worker().put((email_config, msg, account_name))
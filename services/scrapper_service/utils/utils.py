@@ -0,0 +1,48 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """Async token bucket shared by coroutines hitting the same endpoint.
+
+    acquire() blocks until a token is available; pause() closes the gate for a
+    server-advertised FloodWait so every sharer backs off in lockstep instead
+    of burning the wait independently.
+    """
+
+    def __init__(self, rate: float = 1.0, burst: int = 5):
+        """
+        :param rate: Tokens refilled per second
+        :param burst: Maximum tokens accumulated while idle
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._gate = asyncio.Event()
+        self._gate.set()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait for the gate, then take one token, sleeping out any deficit."""
+        await self._gate.wait()
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._tokens = 0.0
+                self._last = time.monotonic()
+            else:
+                self._tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Close the gate for seconds; all waiting coroutines resume together."""
+        if not self._gate.is_set():
+            return  # Already paused
+        self._gate.clear()
+        logger.warning(f"Rate limiter paused for {seconds}s after FloodWait")
+        asyncio.get_running_loop().call_later(seconds, self._gate.set)
@@ -0,0 +1,94 @@
+import logging
+import os
+from multiprocessing import shared_memory
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: all services run on one host in the intended deployment, so large
+# payloads can skip the kernel socket copy and travel through shared memory,
+# with the broker carrying only a tiny (ring, slot, length) reference.
+SHM_ENABLED = os.environ.get('SECGRAM_SHM') == '1'
+SEGMENT_NAME = os.environ.get('SECGRAM_SHM_NAME', 'secgram_shm')
+SLOT_COUNT = int(os.environ.get('SECGRAM_SHM_SLOTS', 16))
+SLOT_SIZE = int(os.environ.get('SECGRAM_SHM_SLOT_SIZE', 1 << 20))
+
+# Payloads smaller than this are cheaper to send inline over the broker.
+MIN_SHM_PAYLOAD = 64 * 1024
+
+class ShmRing:
+    """Fixed-slot shared-memory ring: the owning writer claims slots, readers release them.
+
+    The data segment holds SLOT_COUNT slots of SLOT_SIZE bytes; a separate
+    control segment keeps one status byte per slot (0 = free, 1 = in use).
+    Each ring has exactly one writing process (enforced by get_ring() naming
+    rings per PID), so the claim in write() never races another claim - the
+    only concurrent control-byte transition is a reader freeing a slot, which
+    can only turn a slot the writer skipped into one it may use next pass.
+    """
+
+    def __init__(self, name: str, create: bool = False):
+        self.name = name
+        data_size = SLOT_COUNT * SLOT_SIZE
+        try:
+            self.data = shared_memory.SharedMemory(name=name, create=create, size=data_size)
+            self.control = shared_memory.SharedMemory(name=f"{name}_ctl", create=create,
+                                                      size=SLOT_COUNT)
+        except FileExistsError:
+            # Stale segments from a previous process with the same PID; attach
+            # and reuse them, since this process is now their sole writer.
+            self.data = shared_memory.SharedMemory(name=name)
+            self.control = shared_memory.SharedMemory(name=f"{name}_ctl")
+        if create:
+            self.control.buf[:SLOT_COUNT] = bytes(SLOT_COUNT)
+        logger.debug(f"Attached shared-memory ring {name} ({SLOT_COUNT}x{SLOT_SIZE} bytes)")
+
+    def write(self, buf) -> tuple:
+        """Copy buf into a free slot and return its (slot, length) reference.
+
+        Raises BufferError if the payload is too large or no slot is free.
+        """
+        view = memoryview(buf)
+        if view.nbytes > SLOT_SIZE:
+            raise BufferError(f"Payload of {view.nbytes} bytes exceeds slot size {SLOT_SIZE}")
+        for slot in range(SLOT_COUNT):
+            if self.control.buf[slot] == 0:
+                self.control.buf[slot] = 1
+                offset = slot * SLOT_SIZE
+                self.data.buf[offset:offset + view.nbytes] = view
+                return slot, view.nbytes
+        raise BufferError("Shared-memory ring is full")
+
+    def read(self, slot: int, length: int) -> bytes:
+        """Read a payload out of a slot and mark the slot free again."""
+        offset = slot * SLOT_SIZE
+        payload = bytes(self.data.buf[offset:offset + length])
+        self.control.buf[slot] = 0
+        return payload
+
+    def close(self) -> None:
+        """Detach from the shared-memory segments."""
+        self.data.close()
+        self.control.close()
+
+_ring = None
+_reader_rings = {}
+
+def get_ring() -> 'ShmRing':
+    """Return this process's private writer ring, creating it on first use.
+
+    Rings are named per publishing process (SEGMENT_NAME plus PID) so that
+    every ring has a single writer; two publishers can no longer both claim
+    slot 0 and corrupt each other's payloads. Readers locate the right ring
+    through the ring name carried in the broker reference (see attach_ring).
+    """
+    global _ring
+    if _ring is None:
+        _ring = ShmRing(name=f"{SEGMENT_NAME}_{os.getpid()}", create=True)
+    return _ring
+
+def attach_ring(name: str) -> 'ShmRing':
+    """Attach to a publisher's ring by name (read side), caching attachments."""
+    ring = _reader_rings.get(name)
+    if ring is None:
+        ring = _reader_rings[name] = ShmRing(name=name)
+    return ring